@@ -20,9 +20,56 @@ import os
 import re
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Each category is fused into one alternation of named groups so a single
+# scan over the file finds every pattern; `lastgroup` tells which one matched.
+ERROR_PRONE_PATTERNS = {
+    'expect': r'\.expect\s*\(',
+    'unwrap': r'\.unwrap\s*\(',
+    'panic': r'panic!\s*\(',
+    'unreachable': r'unreachable!\s*\(',
+    'unimplemented': r'unimplemented!\s*\(',
+    'todo': r'todo!\s*\(',
+}
+
+# Look for actual unsafe blocks, not just the word "unsafe" in comments
+UNSAFE_PATTERNS = {
+    'unsafe': r'\bunsafe\s*\{',
+}
+
+# Repeated patterns that might indicate code duplication; the source text
+# is reported in the detail messages.
+DUPLICATE_PATTERNS = {
+    'authorized': r'if\s+!is_authorized\s*\(',  # Authorization checks
+    'err_with_id': r'Response::err_with_id\s*\(',  # Error responses
+    'ok_with_id': r'Response::ok_with_id\s*\(',   # Success responses
+    'tracing': r'tracing::(error|warn|info|debug)!\s*\(',  # Logging patterns
+    'telemetry_cfg': r'#\[cfg\(feature\s*=\s*"telemetry"\)\]',  # Telemetry guards
+    'telemetry_call': r'telemetry::record_counter\s*\(',  # Telemetry calls
+}
+
+def _alternation(patterns: Dict[str, str]) -> re.Pattern:
+    """Compile named patterns into one alternation of named groups.
+
+    The result is run over whole file contents, so whitespace is restricted
+    to a single line to keep the original line-by-line matching semantics.
+    """
+    return re.compile('|'.join(
+        '(?P<%s>%s)' % (name, p.replace(r'\s', r'[^\S\n]'))
+        for name, p in patterns.items()
+    ))
+
+ERROR_PRONE_RE = _alternation(ERROR_PRONE_PATTERNS)
+UNSAFE_RE = _alternation(UNSAFE_PATTERNS)
+DUPLICATE_RE = _alternation(DUPLICATE_PATTERNS)
+
+# A non-comment line containing at least one brace
+BRACE_LINE_RE = re.compile(r'^(?![^\S\n]*//)[^{}\n]*[{}][^\n]*', re.MULTILINE)
 
 class QualityMetrics:
     def __init__(self):
@@ -34,13 +81,40 @@ class QualityMetrics:
         self.files_processed = 0
         self.pattern_details = defaultdict(list)
 
+# Directories that never contain project sources; pruned before descending.
+SKIP_DIRS = {"target", ".git", "node_modules"}
+
+def scan_directory(dir_path: str) -> Tuple[List[str], List[Path]]:
+    """List one directory, returning (subdirectories to descend, Rust files)."""
+    subdirs = []
+    rust_files = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(".rs") and entry.is_file():
+                    rust_files.append(Path(entry.path))
+    except PermissionError:
+        pass
+    return subdirs, rust_files
+
 def find_rust_files(root_path: Path) -> List[Path]:
-    """Find all Rust source files in the project."""
+    """Find all Rust source files in the project.
+    
+    Directories are listed breadth-first, one level at a time, on a thread
+    pool so the blocking scandir calls for sibling directories overlap.
+    """
     rust_files = []
-    for file_path in root_path.rglob("*.rs"):
-        # Skip target directory and test files if needed
-        if "target" not in file_path.parts:
-            rust_files.append(file_path)
+    frontier = [str(root_path)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        while frontier:
+            next_frontier = []
+            for subdirs, files in executor.map(scan_directory, frontier):
+                next_frontier.extend(subdirs)
+                rust_files.extend(files)
+            frontier = next_frontier
     return rust_files
 
 def count_nesting_depth(content: str) -> int:
@@ -48,14 +122,14 @@ def count_nesting_depth(content: str) -> int:
     max_depth = 0
     current_depth = 0
     
-    for line in content.split('\n'):
-        stripped = line.strip()
-        if not stripped or stripped.startswith('//'):
-            continue
-            
+    # Lines without braces cannot change the depth, so let the regex engine
+    # skip them (and comment lines) instead of visiting every line here
+    for m in BRACE_LINE_RE.finditer(content):
+        line = m.group()
+        
         # Count opening braces
-        open_braces = stripped.count('{')
-        close_braces = stripped.count('}')
+        open_braces = line.count('{')
+        close_braces = line.count('}')
         
         current_depth += open_braces
         max_depth = max(max_depth, current_depth)
@@ -64,110 +138,128 @@ def count_nesting_depth(content: str) -> int:
     
     return max_depth
 
-def find_error_prone_patterns(content: str, file_path: Path) -> Tuple[int, List[str]]:
+# Per-file table of line number -> (stripped text, comment prefix), filled
+# lazily and shared by all finders so each matching line is classified once.
+LineTable = Dict[int, Tuple[str, str]]
+
+COMMENT_PREFIXES = ('//', '/*')
+
+def iter_matching_lines(regex: re.Pattern, content: str, lines: LineTable) -> Iterator[Tuple[int, str, str, Set[str]]]:
+    """Scan the whole content once, yielding (line number, stripped line, comment prefix, pattern names) per matching line."""
+    line_no = 1
+    counted_to = 0
+    current_line = 0
+    info = ('', '')
+    found: Set[str] = set()
+    
+    for m in regex.finditer(content):
+        # Matches arrive in order, so line numbers only need counting forward
+        start = m.start()
+        line_no += content.count('\n', counted_to, start)
+        counted_to = start
+        if line_no != current_line:
+            if found:
+                yield (current_line, *info, found)
+            current_line = line_no
+            info = lines.get(line_no)
+            if info is None:
+                line_start = content.rfind('\n', 0, start) + 1
+                line_end = content.find('\n', start)
+                stripped = (content[line_start:line_end] if line_end != -1 else content[line_start:]).strip()
+                prefix = stripped[:2]
+                info = lines[line_no] = (stripped, prefix if prefix in COMMENT_PREFIXES else '')
+            found = set()
+        found.add(m.lastgroup)
+    
+    if found:
+        yield (current_line, *info, found)
+
+def find_error_prone_patterns(content: str, file_path: Path, lines: Optional[LineTable] = None, collect_details: bool = True) -> Tuple[int, List[str]]:
     """Find error-prone patterns like expect(), unwrap(), panic!()."""
-    patterns = [
-        r'\.expect\s*\(',
-        r'\.unwrap\s*\(',
-        r'panic!\s*\(',
-        r'unreachable!\s*\(',
-        r'unimplemented!\s*\(',
-        r'todo!\s*\('
-    ]
-    
     matches = []
     total_count = 0
     
-    lines = content.split('\n')
-    for i, line in enumerate(lines, 1):
-        # Skip comments and documentation
-        stripped = line.strip()
-        if stripped.startswith('//') or stripped.startswith('///') or stripped.startswith('/*'):
+    for i, stripped, comment, found in iter_matching_lines(ERROR_PRONE_RE, content, {} if lines is None else lines):
+        # Skip comments and documentation (//, ///, /*)
+        if comment:
             continue
             
-        for pattern in patterns:
-            if re.search(pattern, line):
-                matches.append(f"{file_path}:{i}: {stripped}")
-                total_count += 1
+        # Each distinct pattern on a line counts once
+        if collect_details:
+            matches.extend([f"{file_path}:{i}: {stripped}"] * len(found))
+        total_count += len(found)
     
     return total_count, matches
 
-def find_unsafe_blocks(content: str, file_path: Path) -> Tuple[int, List[str]]:
+def find_unsafe_blocks(content: str, file_path: Path, lines: Optional[LineTable] = None, collect_details: bool = True) -> Tuple[int, List[str]]:
     """Find unsafe blocks in the code."""
-    # Look for actual unsafe blocks, not just the word "unsafe" in comments
-    unsafe_pattern = r'\bunsafe\s*\{'
-    
     matches = []
     count = 0
     
-    lines = content.split('\n')
-    for i, line in enumerate(lines, 1):
+    for i, stripped, comment, _ in iter_matching_lines(UNSAFE_RE, content, {} if lines is None else lines):
         # Skip comments
-        stripped = line.strip()
-        if stripped.startswith('//') or stripped.startswith('///'):
+        if comment == '//':
             continue
             
-        if re.search(unsafe_pattern, line):
+        if collect_details:
             matches.append(f"{file_path}:{i}: {stripped}")
-            count += 1
+        count += 1
     
     return count, matches
 
-def find_duplicate_patterns(content: str, file_path: Path) -> Tuple[int, List[str]]:
+def find_duplicate_patterns(content: str, file_path: Path, lines: Optional[LineTable] = None, collect_details: bool = True) -> Tuple[int, List[str]]:
     """Find potential duplicate code patterns."""
-    # Look for repeated patterns that might indicate code duplication
-    duplicate_indicators = [
-        r'if\s+!is_authorized\s*\(',  # Authorization checks
-        r'Response::err_with_id\s*\(',  # Error responses
-        r'Response::ok_with_id\s*\(',   # Success responses
-        r'tracing::(error|warn|info|debug)!\s*\(',  # Logging patterns
-        r'#\[cfg\(feature\s*=\s*"telemetry"\)\]',  # Telemetry guards
-        r'telemetry::record_counter\s*\(',  # Telemetry calls
-    ]
-    
     matches = []
     total_count = 0
     
-    lines = content.split('\n')
-    for i, line in enumerate(lines, 1):
-        stripped = line.strip()
-        if stripped.startswith('//'):
+    for i, stripped, comment, found in iter_matching_lines(DUPLICATE_RE, content, {} if lines is None else lines):
+        if comment == '//':
             continue
             
-        for pattern in duplicate_indicators:
-            if re.search(pattern, line):
+        if not collect_details:
+            total_count += len(found)
+            continue
+        for name, pattern in DUPLICATE_PATTERNS.items():
+            if name in found:
                 matches.append(f"{file_path}:{i}: Pattern - {pattern}")
                 total_count += 1
     
     return total_count, matches
 
-def analyze_file(file_path: Path) -> QualityMetrics:
-    """Analyze a single Rust file for quality metrics."""
+def analyze_file(file_path: Path, collect_details: bool = True) -> QualityMetrics:
+    """Analyze a single Rust file for quality metrics.
+    
+    Detail strings are only built when collect_details is set; counts are
+    always computed.
+    """
     try:
-        content = file_path.read_text(encoding='utf-8')
+        content = file_path.read_bytes().decode('utf-8')
     except (UnicodeDecodeError, PermissionError) as e:
         print(f"Warning: Could not read {file_path}: {e}")
         return QualityMetrics()
     
     metrics = QualityMetrics()
     metrics.files_processed = 1
-    metrics.total_lines = len(content.split('\n'))
+    metrics.total_lines = content.count('\n') + 1
     
     # Measure nesting depth
     metrics.max_nesting_depth = count_nesting_depth(content)
     
+    # Line classification shared by the finders below
+    lines: LineTable = {}
+    
     # Find error-prone patterns
-    error_count, error_details = find_error_prone_patterns(content, file_path)
+    error_count, error_details = find_error_prone_patterns(content, file_path, lines, collect_details)
     metrics.error_prone_patterns = error_count
     metrics.pattern_details['error_prone'].extend(error_details)
     
     # Find unsafe blocks
-    unsafe_count, unsafe_details = find_unsafe_blocks(content, file_path)
+    unsafe_count, unsafe_details = find_unsafe_blocks(content, file_path, lines, collect_details)
     metrics.unsafe_blocks = unsafe_count
     metrics.pattern_details['unsafe'].extend(unsafe_details)
     
     # Find duplicate patterns
-    dup_count, dup_details = find_duplicate_patterns(content, file_path)
+    dup_count, dup_details = find_duplicate_patterns(content, file_path, lines, collect_details)
     metrics.duplicate_patterns = dup_count
     metrics.pattern_details['duplicates'].extend(dup_details)
     
@@ -269,14 +361,17 @@ def main():
     
     print(f"Found {len(rust_files)} Rust source files")
     
-    # Analyze each file
+    # Analyze each file; files are independent, so fan out across cores
     all_metrics = []
-    for file_path in rust_files:
-        if verbose:
-            print(f"Analyzing: {file_path.relative_to(project_root)}")
-        
-        file_metrics = analyze_file(file_path)
-        all_metrics.append(file_metrics)
+    with ProcessPoolExecutor() as executor:
+        # Detailed findings are only printed in verbose mode
+        analyze = partial(analyze_file, collect_details=verbose)
+        results = executor.map(analyze, rust_files, chunksize=32)
+        for file_path, file_metrics in zip(rust_files, results):
+            if verbose:
+                print(f"Analyzing: {file_path.relative_to(project_root)}")
+            
+            all_metrics.append(file_metrics)
     
     # Merge all metrics
     combined_metrics = merge_metrics(all_metrics)
@@ -38,14 +38,16 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import io
 import json
 import os
 import re
 import sys
+import zlib
 from dataclasses import dataclass, asdict
 from datetime import datetime, UTC
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
 
 ROOT = Path(__file__).resolve().parent.parent
 SPEC_DIR = ROOT / "spec"
@@ -56,7 +58,9 @@ DELTA_DOC_JA = DOCS_DIR / "ja" / "v1_0_diff.md"
 JSON_REPORT = SPEC_DIR / "spec_diff_report.json"
 MD_REPORT = DOCS_DIR / "spec_diff_report.md"
 
-SECTION_HEADING_RE = re.compile(r"^## +(.+?)\s*$")
+SECTION_HEADING_RE = re.compile(rb"^## +(.+?)[^\S\n]*$", re.MULTILINE)
+# Bytes str.strip() would remove around a section body (ASCII whitespace).
+_STRIP_BYTES = frozenset(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
 
 # Feature category → representative keywords to look for in diff docs.
 FEATURE_KEYWORDS = {
@@ -72,76 +76,134 @@ FEATURE_KEYWORDS = {
 }
 
 
+_NORMALIZE_TABLE = bytes(
+    c if (0x61 <= c <= 0x7A or 0x30 <= c <= 0x39) else 0x20 for c in range(256)
+)
+
+
 @dataclass
 class SectionInfo:
     title: str
     hash: str
     changed: bool = False
+    # Cheap body fingerprint (byte length + CRC-32) used to skip re-hashing
+    # sections that are unchanged since the previous run.
+    size: int = 0
+    crc32: int = 0
 
 
-def read_text(path: Path) -> str:
+def read_bytes(path: Path) -> bytes:
     try:
-        return path.read_text(encoding="utf-8")
+        return path.read_bytes()
     except FileNotFoundError:
-        return ""
-
-
-def extract_sections(spec_content: str) -> List[Tuple[str, str]]:
-    """Return list of (title, body) for each top-level '## ' section."""
-    lines = spec_content.splitlines()
-    sections: List[Tuple[str, List[str]]] = []
-    current_title: Optional[str] = None
-    current_body: List[str] = []
-    for line in lines:
-        m = SECTION_HEADING_RE.match(line)
-        if m:
-            if current_title is not None:
-                sections.append((current_title, current_body))
-            current_title = m.group(1).strip()
-            current_body = []
-        else:
-            if current_title is not None:
-                current_body.append(line)
-    if current_title is not None:
-        sections.append((current_title, current_body))
-    out: List[Tuple[str, str]] = []
-    for title, body_lines in sections:
-        body = "\n".join(body_lines).strip()
-        out.append((title, body))
+        return b""
+
+
+def extract_sections(spec_bytes: bytes) -> List[Tuple[str, memoryview]]:
+    """Return list of (title, body) for each top-level '## ' section.
+
+    Bodies are zero-copy views into the (LF-normalised) spec buffer, trimmed
+    of surrounding whitespace, so they hash the same as the decoded text did.
+    """
+    if b"\r\n" in spec_bytes:
+        spec_bytes = spec_bytes.replace(b"\r\n", b"\n")
+    view = memoryview(spec_bytes)
+    headings = list(SECTION_HEADING_RE.finditer(spec_bytes))
+    out: List[Tuple[str, memoryview]] = []
+    for i, m in enumerate(headings):
+        start = m.end() + 1  # skip the heading's newline
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(spec_bytes)
+        while start < end and spec_bytes[start] in _STRIP_BYTES:
+            start += 1
+        while end > start and spec_bytes[end - 1] in _STRIP_BYTES:
+            end -= 1
+        out.append((m.group(1).decode("utf-8").strip(), view[start:end]))
     return out
 
 
-def sha256(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
 
 
-def build_section_infos(spec_content: str, previous: Dict[str, Dict]) -> List[SectionInfo]:
+def file_sha256(path: Path) -> str:
+    """SHA256 of a file, streamed in chunks so it is never loaded whole (missing == empty)."""
+    try:
+        with path.open("rb") as fh:
+            return hashlib.file_digest(fh, "sha256").hexdigest()
+    except FileNotFoundError:
+        return sha256(b"")
+
+
+def build_section_infos(spec_bytes: bytes, previous: Dict[str, Dict]) -> List[SectionInfo]:
     infos: List[SectionInfo] = []
-    for title, body in extract_sections(spec_content):
-        h = sha256(body)
-        prev_hash = previous.get(title, {}).get("hash") if previous else None
-        infos.append(SectionInfo(title=title, hash=h, changed=(prev_hash is not None and prev_hash != h)))
+    for title, body in extract_sections(spec_bytes):
+        prev_info = previous.get(title, {}) if previous else {}
+        prev_hash = prev_info.get("hash")
+        crc = zlib.crc32(body)
+        if prev_hash is not None and prev_info.get("size") == len(body) and prev_info.get("crc32") == crc:
+            # Fingerprint matches the previous run; only edited sections pay for SHA256.
+            h = prev_hash
+        else:
+            h = sha256(body)
+        infos.append(SectionInfo(title=title, hash=h, changed=(prev_hash is not None and prev_hash != h), size=len(body), crc32=crc))
     return infos
 
 
+def cached_section_infos(previous_report: Dict, spec_stat: os.stat_result) -> Optional[List[SectionInfo]]:
+    """Reuse the previous run's section hashes if the spec file is untouched.
+
+    The spec's (mtime, size) recorded in the last report acts as the cache
+    key; on a hit no section is re-extracted or re-hashed. Returns None on a
+    miss.
+    """
+    sections = previous_report.get("sections")
+    if (
+        not sections
+        or previous_report.get("spec_mtime_ns") != spec_stat.st_mtime_ns
+        or previous_report.get("spec_size") != spec_stat.st_size
+    ):
+        return None
+    # Same bytes as last time, so nothing has changed since that run.
+    return [
+        SectionInfo(title=title, hash=info["hash"], size=info.get("size", 0), crc32=info.get("crc32", 0))
+        for title, info in sections.items()
+    ]
+
+
 def _normalize_for_match(text: str) -> str:
-    # Lowercase, replace hyphens/underscores with space, remove non-alphanum (keep spaces), collapse spaces.
-    t = text.lower()
-    t = re.sub(r"[-_]+", " ", t)
-    t = re.sub(r"[^a-z0-9 ]+", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+    # Lowercase, turn everything but [a-z0-9] (hyphens, underscores, punctuation,
+    # non-ASCII) into spaces, collapse spaces. Non-ASCII becomes '?' on encode so
+    # the 256-entry table covers every input character.
+    t = text.lower().encode("ascii", "replace").translate(_NORMALIZE_TABLE)
+    return b" ".join(t.split()).decode("ascii")
+
+
+# Keywords are normalised once at import; variants that normalise alike
+# (e.g. "Low Power" / "Low-Power") share a single search.
+_NORMALIZED_KEYWORDS = {kw: _normalize_for_match(kw) for kws in FEATURE_KEYWORDS.values() for kw in kws}
 
 
 def keyword_coverage(doc_texts: List[str]) -> Dict[str, Dict[str, bool]]:
     joined = "\n".join(doc_texts)
     norm_text = _normalize_for_match(joined)
+    present = {norm_kw: norm_kw in norm_text for norm_kw in set(_NORMALIZED_KEYWORDS.values())}
     cov: Dict[str, Dict[str, bool]] = {}
     for cat, kws in FEATURE_KEYWORDS.items():
-        cov[cat] = {}
-        for kw in kws:
-            norm_kw = _normalize_for_match(kw)
-            cov[cat][kw] = norm_kw in norm_text
+        cov[cat] = {kw: present[_NORMALIZED_KEYWORDS[kw]] for kw in kws}
+    return cov
+
+
+def cached_keyword_coverage(previous_report: Dict, doc_hashes: List[str]) -> Optional[Dict[str, Dict[str, bool]]]:
+    """Reuse the previous run's keyword coverage if the delta docs are byte-identical.
+
+    Only applies while the recorded coverage still covers exactly the current
+    FEATURE_KEYWORDS. Returns None on a miss.
+    """
+    cov = previous_report.get("keyword_coverage")
+    if previous_report.get("doc_hashes") != doc_hashes or not isinstance(cov, dict):
+        return None
+    if {cat: list(d) for cat, d in cov.items()} != FEATURE_KEYWORDS:
+        return None
     return cov
 
 
@@ -165,85 +227,108 @@ def load_previous_report() -> Dict:
     return {}
 
 
+def write_atomic(path: Path, write: Callable[[TextIO], object]) -> None:
+    """Stream output into a sibling temp file, then os.replace() it into place.
+
+    Readers (CI steps, verify.py) never observe a half-written report.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", buffering=1 << 16) as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
 def generate_markdown(sections: List[SectionInfo], cov: Dict[str, Dict[str, bool]], cov_score: float, new_sections: List[str], removed_sections: List[str], mapping_summary: Optional[Dict[str, object]] = None) -> str:
-    lines: List[str] = []
-    lines.append("# Spec / Docs Drift Report")
-    lines.append("")
-    lines.append(f"Generated: {datetime.now(UTC).isoformat()}")
-    lines.append("")
-    lines.append("## Section Hashes")
-    lines.append("")
-    lines.append("| Section | SHA256 | Changed |")
-    lines.append("|---------|--------|---------|")
+    buf = io.StringIO()
+    w = buf.write
+    w("# Spec / Docs Drift Report\n")
+    w("\n")
+    w(f"Generated: {datetime.now(UTC).isoformat()}\n")
+    w("\n")
+    w("## Section Hashes\n")
+    w("\n")
+    w("| Section | SHA256 | Changed |\n")
+    w("|---------|--------|---------|\n")
     for s in sections:
-        lines.append(f"| {s.title} | `{s.hash[:12]}` | {'✅' if s.changed else ''} |")
-    lines.append("")
+        w(f"| {s.title} | `{s.hash[:12]}` | {'✅' if s.changed else ''} |\n")
+    w("\n")
     if new_sections or removed_sections:
-        lines.append("## Structure Changes")
+        w("## Structure Changes\n")
         if new_sections:
-            lines.append("**New Sections:** " + ", ".join(new_sections))
+            w("**New Sections:** " + ", ".join(new_sections) + "\n")
         if removed_sections:
-            lines.append("**Removed Sections:** " + ", ".join(removed_sections))
-        lines.append("")
-    lines.append("## Feature Keyword Coverage")
-    lines.append("")
-    lines.append(f"Overall Keyword Coverage: **{cov_score:.1f}%**")
-    lines.append("")
-    lines.append("| Category | Keyword | Present |")
-    lines.append("|----------|---------|---------|")
+            w("**Removed Sections:** " + ", ".join(removed_sections) + "\n")
+        w("\n")
+    w("## Feature Keyword Coverage\n")
+    w("\n")
+    w(f"Overall Keyword Coverage: **{cov_score:.1f}%**\n")
+    w("\n")
+    w("| Category | Keyword | Present |\n")
+    w("|----------|---------|---------|\n")
     for cat, d in cov.items():
         for kw, present in d.items():
-            lines.append(f"| {cat} | {kw} | {'✅' if present else '❌'} |")
-    lines.append("")
+            w(f"| {cat} | {kw} | {'✅' if present else '❌'} |\n")
+    w("\n")
     # Uncovered summary for quick gap-driven doc tasks.
     uncovered: List[str] = []
     for cat, d in cov.items():
         missing = [kw for kw, present in d.items() if not present]
         if missing:
-            uncovered.append(f"- {cat}: {', '.join(missing)}")
+            uncovered.append(f"- {cat}: {', '.join(missing)}\n")
     if uncovered:
-        lines.append("### Uncovered Keywords")
-        lines.append("")
-        lines.append("以下のキーワードは diff ドキュメントで未検出です:")
-        lines.extend(uncovered)
-        lines.append("")
-    lines.append("## Notes")
-    lines.append("- 'Changed' indicates hash difference vs previous run for that section body.")
-    lines.append("- Keyword coverage is heuristic (presence-based), not semantic validation.")
+        w("### Uncovered Keywords\n")
+        w("\n")
+        w("以下のキーワードは diff ドキュメントで未検出です:\n")
+        w("".join(uncovered))
+        w("\n")
+    w("## Notes\n")
+    w("- 'Changed' indicates hash difference vs previous run for that section body.\n")
+    w("- Keyword coverage is heuristic (presence-based), not semantic validation.\n")
 
     # Section mapping coverage (from spec_test_mapping.json)
     if mapping_summary is not None:
-        lines.append("")
-        lines.append("## Section Mapping Coverage (@spec)")
-        lines.append("")
-        lines.append(f"Section Coverage: **{mapping_summary.get('section_coverage_percent', 0.0):.1f}%**  ")
-        lines.append(f"Mapped Sections: {mapping_summary.get('mapped_section_count', 0)}/{mapping_summary.get('total_section_count', 0)}")
+        w("\n")
+        w("## Section Mapping Coverage (@spec)\n")
+        w("\n")
+        w(f"Section Coverage: **{mapping_summary.get('section_coverage_percent', 0.0):.1f}%**  \n")
+        w(f"Mapped Sections: {mapping_summary.get('mapped_section_count', 0)}/{mapping_summary.get('total_section_count', 0)}\n")
         unmapped = mapping_summary.get('unmapped_sections', []) or []
         if unmapped:
-            lines.append("")
-            lines.append("Unmapped Sections:")
+            w("\n")
+            w("Unmapped Sections:\n")
             for s in unmapped:
-                lines.append(f"- {s}")
-        lines.append("")
-    return "\n".join(lines) + "\n"
+                w(f"- {s}\n")
+        w("\n")
+    return buf.getvalue()
 
 
 def main(threshold: float) -> int:
-    spec_text = read_text(SPEC_FILE)
-    if not spec_text:
+    spec_bytes = read_bytes(SPEC_FILE)
+    if not spec_bytes:
         print(f"ERROR: Spec file not found: {SPEC_FILE}", file=sys.stderr)
         return 1
 
-    prev = load_previous_report().get("sections", {})
-    sections = build_section_infos(spec_text, prev)
+    previous_report = load_previous_report()
+    prev = previous_report.get("sections", {})
+    spec_stat = SPEC_FILE.stat()
+    sections = cached_section_infos(previous_report, spec_stat)
+    if sections is None:
+        sections = build_section_infos(spec_bytes, prev)
     prev_titles = set(prev.keys()) if prev else set()
     current_titles = {s.title for s in sections}
     new_sections = sorted(list(current_titles - prev_titles))
     removed_sections = sorted(list(prev_titles - current_titles))
 
     # Coverage over both English & Japanese delta docs (if available)
-    delta_docs = [read_text(DELTA_DOC_EN), read_text(DELTA_DOC_JA)]
-    cov = keyword_coverage(delta_docs)
+    delta_docs = [DELTA_DOC_EN, DELTA_DOC_JA]
+    doc_hashes = [file_sha256(doc) for doc in delta_docs]
+    cov = cached_keyword_coverage(previous_report, doc_hashes)
+    if cov is None:
+        cov = keyword_coverage([read_bytes(doc).decode("utf-8") for doc in delta_docs])
     cov_score = coverage_score(cov)
 
     # Optionally load mapping coverage from spec_test_mapping.json
@@ -258,9 +343,12 @@ def main(threshold: float) -> int:
     report = {
         "timestamp": datetime.now(UTC).isoformat(),
         "spec_file": str(SPEC_FILE.relative_to(ROOT)),
+        "spec_mtime_ns": spec_stat.st_mtime_ns,
+        "spec_size": spec_stat.st_size,
         "sections": {s.title: asdict(s) for s in sections},
         "new_sections": new_sections,
         "removed_sections": removed_sections,
+        "doc_hashes": doc_hashes,
         "keyword_coverage_percent": cov_score,
         "keyword_coverage": cov,
         "uncovered_keywords": {cat: [kw for kw, present in d.items() if not present] for cat, d in cov.items() if any(not v for v in d.values())},
@@ -274,18 +362,16 @@ def main(threshold: float) -> int:
         "coverage_threshold_met": cov_score >= threshold,
     }
 
-    JSON_REPORT.write_text(json.dumps(report, indent=2), encoding="utf-8")
-    MD_REPORT.write_text(
-        generate_markdown(
-            sections,
-            cov,
-            cov_score,
-            new_sections,
-            removed_sections,
-            report.get("section_mapping") if report.get("section_mapping", {}).get("section_coverage_percent") is not None else None,
-        ),
-        encoding="utf-8",
+    write_atomic(JSON_REPORT, lambda fh: json.dump(report, fh, indent=2))
+    markdown = generate_markdown(
+        sections,
+        cov,
+        cov_score,
+        new_sections,
+        removed_sections,
+        report.get("section_mapping") if report.get("section_mapping", {}).get("section_coverage_percent") is not None else None,
     )
+    write_atomic(MD_REPORT, lambda fh: fh.write(markdown))
 
     print(f"Spec diff report written: {JSON_REPORT}")
     print(f"Markdown report written: {MD_REPORT}")
@@ -12,7 +12,7 @@ Limitations:
   - Does not parse nested modules deeply (simple regex)
 """
 from __future__ import annotations
-import re, json, sys
+import io, os, re, json, sys, mmap
 from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 # Include crate-level tests and internal test modules.
@@ -24,29 +24,43 @@ JSON_OUT = ROOT/"spec"/"spec_test_mapping.json"
 MD_OUT = ROOT/"docs"/"SPEC_TEST_MAPPING.md"
 MARKER = "## 当面の手動ダイジェスト (抜粋)"  # we will replace everything below this with generated table
 
-SPEC_SECTIONS = []
-sec_re = re.compile(r'^## +(.+)$')
-with SPEC_FILE.open(encoding='utf-8') as f:
-    for line in f:
-        m = sec_re.match(line.strip())
-        if m:
-            SPEC_SECTIONS.append(m.group(1).strip())
+def write_atomic(path: Path, write) -> None:
+    """Write via a sibling temp file and os.replace() so readers never see a partial file."""
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", buffering=1 << 16) as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+# One pass over the whole spec; same headings as matching '^## +(.+)$' against
+# each stripped line (the title must contain a non-space character).
+sec_re = re.compile(r'^[^\S\n]*## +([^\n]*\S)', re.M)
+SPEC_SECTIONS = [t.strip() for t in sec_re.findall(SPEC_FILE.read_text(encoding='utf-8'))]
 
 # Collect annotations
-spec_map: dict[str, list[str]] = {}
-fn_name_re = re.compile(r'^\s*(?:pub\s+)?(?:async\s+)?fn\s+([a-zA-Z0-9_]+)\s*\(')
-annot_re = re.compile(r'^\s*///\s*@spec\s+(.+)$')
+# section -> insertion-ordered set of test identifiers
+spec_map: dict[str, dict[str, None]] = {}
+# One byte pattern run over each whole (mmapped) file: a line is either an
+# @spec annotation or a fn signature. Whitespace is kept to a single line so
+# it matches exactly what a per-line scan would.
+spec_or_fn_re = re.compile(
+    rb'^[^\S\n]*(?:///[^\S\n]*@spec[^\S\n]+(?P<spec>.+)$'
+    rb'|(?:pub[^\S\n]+)?(?:async[^\S\n]+)?fn[^\S\n]+(?P<fn>[a-zA-Z0-9_]+)[^\S\n]*\()',
+    re.M,
+)
 current_annots: list[str] = []
 current_fn: str | None = None
 current_path: Path | None = None
+current_rel: str = ""  # current_path relative to ROOT, computed once per file
 
 def flush():
     if current_fn and current_annots and current_path:
-        ident = f"{current_path.relative_to(ROOT).as_posix()}::{current_fn}"
+        ident = f"{current_rel}::{current_fn}"
         for sec in current_annots:
-            bucket = spec_map.setdefault(sec, [])
-            if ident not in bucket:
-                bucket.append(ident)
+            spec_map.setdefault(sec, {})[ident] = None
 
 for glob in TEST_GLOBS:
     for path in ROOT.glob(glob):
@@ -55,38 +69,47 @@ for glob in TEST_GLOBS:
         current_annots = []
         current_fn = None
         current_path = path
-        with path.open(encoding='utf-8') as f:
-            for line in f:
-                a = annot_re.match(line)
-                if a:
-                    current_annots.append(a.group(1).strip())
-                m = fn_name_re.match(line)
-                if m:
+        if path.stat().st_size == 0:
+            continue  # mmap cannot map empty files
+        current_rel = path.relative_to(ROOT).as_posix()
+        with path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Only matched groups are decoded
+            for m in spec_or_fn_re.finditer(mm):
+                if m.lastgroup == 'spec':
+                    current_annots.append(m.group('spec').decode('utf-8').strip())
+                else:
                     # reached a function; previous annotations belong to this fn
-                    current_fn = m.group(1)
+                    current_fn = m.group('fn').decode('ascii')
                     flush()
                     current_annots = []
                     current_fn = None
         # in case file ends without new function (ignored)
 
 # Determine coverage strictly against numbered sections existing in the spec file
-numbered_sections = [s for s in SPEC_SECTIONS if any(s.startswith(prefix) for prefix in ("1.","2.","3.","4.","5.","6.","7.","8.","9.","10."))]
+NUMBERED_HEADS = frozenset(str(n) for n in range(1, 11))  # "1." .. "10."
+
+def is_numbered(section: str) -> bool:
+    head, sep, _ = section.partition('.')
+    return bool(sep) and head in NUMBERED_HEADS
+
+numbered_sections = [s for s in SPEC_SECTIONS if is_numbered(s)]
 numbered_set = set(numbered_sections)
-mapped_keys = set(spec_map.keys())
-mapped_numbered = sorted(list(numbered_set.intersection(mapped_keys)))
-unmapped = sorted(list(numbered_set.difference(mapped_keys)))
+mapped_numbered = sorted(s for s in numbered_set if s in spec_map)
+unmapped = sorted(s for s in numbered_set if s not in spec_map)
 
 total_numbered = len(numbered_sections)
 section_coverage = (len(mapped_numbered)/total_numbered*100.0) if total_numbered else 0.0
 report = {
-    "sections": spec_map,
+    "sections": {sec: list(tests) for sec, tests in spec_map.items()},
     "mapped_sections": mapped_numbered,
     "unmapped_sections": unmapped,
     "section_coverage_percent": section_coverage,
     "mapped_section_count": len(mapped_numbered),
     "total_section_count": total_numbered
 }
-JSON_OUT.write_text(json.dumps(report, indent=2), encoding='utf-8')
+# Stream straight into the buffered temp file; consumers (spec_diff.py,
+# verify.py) read it as UTF-8, so non-ASCII titles are written unescaped.
+write_atomic(JSON_OUT, lambda fh: json.dump(report, fh, indent=2, ensure_ascii=False))
 
 # Update Markdown
 if MD_OUT.exists():
@@ -104,19 +127,21 @@ except StopIteration:
 
 kept = orig_lines[:marker_idx+1]
 
-generated: list[str] = []
-generated.append("")
-generated.append(f"自動生成テーブル (セクションカバレッジ {section_coverage:.1f}%: {len(mapped_numbered)}/{total_numbered}):")
-generated.append("")
-generated.append('| Spec 節 | テストケース |')
-generated.append('|---------|--------------|')
+buf = io.StringIO()
+w = buf.write
+w('\n'.join(kept))
+w("\n\n")
+w(f"自動生成テーブル (セクションカバレッジ {section_coverage:.1f}%: {len(mapped_numbered)}/{total_numbered}):\n")
+w("\n")
+w('| Spec 節 | テストケース |\n')
+w('|---------|--------------|\n')
 for sec, tests in sorted(spec_map.items(), key=lambda x: x[0]):
-    generated.append(f"| {sec} | {'<br>'.join(tests)} |")
-generated.append("")
-generated.append('未マッピング節: ' + (', '.join(unmapped) if unmapped else 'なし'))
-generated.append("")
-generated.append('---')
-generated.append('このセクション以下は自動生成されます。手動編集は次回上書きされます。')
-
-MD_OUT.write_text('\n'.join(kept+generated)+"\n", encoding='utf-8')
+    w(f"| {sec} | {'<br>'.join(tests)} |\n")
+w("\n")
+w('未マッピング節: ' + (', '.join(unmapped) if unmapped else 'なし') + "\n")
+w("\n")
+w('---\n')
+w('このセクション以下は自動生成されます。手動編集は次回上書きされます。\n')
+
+write_atomic(MD_OUT, lambda fh: fh.write(buf.getvalue()))
 print(f"Wrote {JSON_OUT} and updated {MD_OUT}")